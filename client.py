@@ -2,17 +2,36 @@ import pygame
 import socket
 import json
 import threading
-import time
 import sys
 import math
 import random
+from collections import OrderedDict
+from functools import lru_cache
 from enum import Enum
 from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    json_loads = json.loads
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if hasattr(pygame.Surface, "fblits"):
+    blit_batch = pygame.Surface.fblits
+else:
+    def blit_batch(surface: pygame.Surface, ops) -> None:
+        surface.blits(ops, doreturn=False)
+
 class GameState(Enum):
     MENU = "menu"
     LEVEL_SELECT = "level_select"
@@ -20,7 +39,56 @@ class GameState(Enum):
     PLAYING = "playing"
     FINISHED = "finished"
 
+_SHAKE_NOISE_MASK = 4095
+_SHAKE_NOISE = [random.random() - 0.5 for _ in range(_SHAKE_NOISE_MASK + 1)]
+
+_PI3 = math.pi * 3
+_BOUNCE_DURATION = 0.5
+_INV_BOUNCE_DURATION = 1.0 / _BOUNCE_DURATION
+_SHAKE_DURATION = 0.3
+_SHAKE_AMPLITUDE = 10.0 / _SHAKE_DURATION
+
+@lru_cache(maxsize=256)
+def _gradient_surface(color1: Tuple, color2: Tuple, width: int, height: int, corner_radius: int = 15) -> pygame.Surface:
+    strip = pygame.Surface((1, 2), pygame.SRCALPHA)
+    strip.set_at((0, 0), color1)
+    strip.set_at((0, 1), color2)
+    gradient = pygame.transform.smoothscale(strip, (width, height))
+    
+    mask_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    pygame.draw.rect(mask_surface, (255, 255, 255, 255),
+                     (0, 0, width, height), border_radius=corner_radius)
+    
+    gradient.blit(mask_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    return gradient
+
+_PARTICLE_CACHE: Dict[Tuple[int, int], pygame.Surface] = {}
+
+def _particle_surface(size: int, alpha: int) -> pygame.Surface:
+    key = (size, alpha)
+    particle = _PARTICLE_CACHE.get(key)
+    if particle is None:
+        particle = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.circle(particle, (255, 255, 255, alpha), (size, size), size)
+        _PARTICLE_CACHE[key] = particle
+    return particle
+
+_FACE_CACHE: Dict[Tuple, pygame.Surface] = {}
+
 class Card:
+    COLORS = {
+        'card_0': ((255, 120, 120), (220, 80, 80)),
+        'card_1': ((120, 255, 120), (80, 220, 80)),
+        'card_2': ((120, 120, 255), (80, 80, 220)),
+        'card_3': ((255, 255, 120), (220, 220, 80)),
+        'card_4': ((255, 120, 255), (220, 80, 220)),
+        'card_5': ((120, 255, 255), (80, 220, 220)),
+        'card_6': ((255, 180, 120), (220, 140, 80)),
+        'card_7': ((180, 120, 255), (140, 80, 220)),
+    }
+    DEFAULT_COLORS = ((128, 128, 128), (100, 100, 100))
+    BACK_COLORS = ((70, 70, 180), (40, 40, 120))
+
     def __init__(self, card_id: int, x: int, y: int, width: int, height: int):
         self.id = card_id
         self.x = x
@@ -39,29 +107,23 @@ class Card:
         self.shake_offset_x = 0.0
         self.shake_offset_y = 0.0
         self.shake_timer = 0.0
+        self._noise_index = (card_id * 64) & _SHAKE_NOISE_MASK
         self.scale = 1.0
         self.target_scale = 1.0
         self.glow_intensity = 0.0
         self.match_celebration_timer = 0.0
         
-        self.colors = {
-            'card_0': [(255, 120, 120), (220, 80, 80)],
-            'card_1': [(120, 255, 120), (80, 220, 80)],
-            'card_2': [(120, 120, 255), (80, 80, 220)],
-            'card_3': [(255, 255, 120), (220, 220, 80)],
-            'card_4': [(255, 120, 255), (220, 80, 220)],
-            'card_5': [(120, 255, 255), (80, 220, 220)],
-            'card_6': [(255, 180, 120), (220, 140, 80)],
-            'card_7': [(180, 120, 255), (140, 80, 220)],
-        }
-        
-        self.back_color = [(70, 70, 180), (40, 40, 120)]
+        for value in self.COLORS:
+            self._front_template(value, False)
+            self._front_template(value, True)
+        self._back_template()
 
-    def update(self, card_data: Dict, dt: float):
+    def update_state(self, card_data: Dict):
         old_revealed = self.revealed
         old_matched = self.matched
         
-        self.value = card_data.get('value')
+        value = card_data.get('value')
+        self.value = sys.intern(value) if value else value
         self.revealed = card_data.get('revealed', False)
         self.matched = card_data.get('matched', False)
         
@@ -70,6 +132,16 @@ class Card:
         else:
             self.target_flip = 0.0
         
+        if self.revealed and not old_revealed:
+            self.bounce_timer = _BOUNCE_DURATION
+        
+        if self.matched and not old_matched:
+            self.match_celebration_timer = 1.0
+            self.target_scale = 1.2
+        elif old_revealed and not self.revealed:
+            self.trigger_shake()
+
+    def tick(self, dt: float):
         flip_speed = 8.0
         if abs(self.flip_progress - self.target_flip) > 0.01:
             if self.flip_progress < self.target_flip:
@@ -77,20 +149,13 @@ class Card:
             else:
                 self.flip_progress = max(0.0, self.flip_progress - flip_speed * dt)
         
-        if self.revealed and not old_revealed:
-            self.bounce_timer = 0.5
-        
         if self.bounce_timer > 0:
             self.bounce_timer -= dt
-            bounce_progress = 1.0 - (self.bounce_timer / 0.5)
-            self.bounce_offset = math.sin(bounce_progress * math.pi * 3) * 10 * (1 - bounce_progress)
+            bounce_remaining = self.bounce_timer * _INV_BOUNCE_DURATION
+            self.bounce_offset = math.sin((1.0 - bounce_remaining) * _PI3) * 10.0 * bounce_remaining
         else:
             self.bounce_offset = 0
         
-        if self.matched and not old_matched:
-            self.match_celebration_timer = 1.0
-            self.target_scale = 1.2
-        
         if self.match_celebration_timer > 0:
             self.match_celebration_timer -= dt
             if self.match_celebration_timer <= 0:
@@ -105,9 +170,11 @@ class Card:
         
         if self.shake_timer > 0:
             self.shake_timer -= dt
-            shake_intensity = self.shake_timer / 0.3
-            self.shake_offset_x = (random.random() - 0.5) * 10 * shake_intensity
-            self.shake_offset_y = (random.random() - 0.5) * 10 * shake_intensity
+            shake_amplitude = self.shake_timer * _SHAKE_AMPLITUDE
+            i = self._noise_index
+            self.shake_offset_x = _SHAKE_NOISE[i] * shake_amplitude
+            self.shake_offset_y = _SHAKE_NOISE[i + 1] * shake_amplitude
+            self._noise_index = (i + 2) & _SHAKE_NOISE_MASK
         else:
             self.shake_offset_x = 0
             self.shake_offset_y = 0
@@ -115,47 +182,101 @@ class Card:
         if self.glow_intensity > 0:
             self.glow_intensity = max(0, self.glow_intensity - dt * 2)
 
+    @property
+    def is_animating(self) -> bool:
+        return (abs(self.flip_progress - self.target_flip) > 0.01
+                or abs(self.scale - self.target_scale) > 0.01
+                or self.bounce_timer > 0 or self.bounce_offset != 0
+                or self.shake_timer > 0 or self.shake_offset_x != 0 or self.shake_offset_y != 0
+                or self.match_celebration_timer > 0 or self.glow_intensity > 0)
+
     def trigger_shake(self):
-        self.shake_timer = 0.3
+        self.shake_timer = _SHAKE_DURATION
 
     def trigger_glow(self):
         self.glow_intensity = 1.0
 
     def draw_gradient_rect(self, surface, color1, color2, rect, corner_radius=15):
-        temp_surface = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        
-        for y in range(max(1, rect.height)):
-            ratio = y / max(1, rect.height)
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            pygame.draw.line(temp_surface, (r, g, b), (0, y), (rect.width, y))
-        
-        mask_surface = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(mask_surface, (255, 255, 255, 255),
-                         (0, 0, rect.width, rect.height), border_radius=corner_radius)
-        
-        temp_surface.blit(mask_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
-        
-        surface.blit(temp_surface, rect.topleft)
+        gradient = _gradient_surface(tuple(color1), tuple(color2), self.width, self.height, corner_radius)
+        if gradient.get_size() != rect.size:
+            gradient = pygame.transform.scale(gradient, rect.size)
+        surface.blit(gradient, rect.topleft)
 
-    def draw(self, screen):
+    def _front_template(self, value, matched: bool) -> pygame.Surface:
+        key = (value, matched, self.width, self.height)
+        template = _FACE_CACHE.get(key)
+        if template is None:
+            template = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            rect = template.get_rect()
+            
+            color1, color2 = self.COLORS.get(value, self.DEFAULT_COLORS)
+            
+            self.draw_gradient_rect(template, color1, color2, rect, 15)
+            
+            border_color = (255, 255, 255) if not matched else (0, 255, 0)
+            pygame.draw.rect(template, border_color, rect, 3, border_radius=15)
+            
+            center_x = rect.centerx
+            center_y = rect.centery
+            symbol_radius = min(20, rect.width // 4)
+            
+            pygame.draw.circle(template, (255, 255, 255), (center_x, center_y), symbol_radius + 5)
+            pygame.draw.circle(template, (0, 0, 0), (center_x, center_y), symbol_radius + 5, 2)
+            
+            if value:
+                symbol_color = color2
+                pygame.draw.circle(template, symbol_color, (center_x, center_y), symbol_radius)
+            
+            if matched:
+                pygame.draw.lines(template, (0, 200, 0), False,
+                                [(center_x - 12, center_y),
+                                 (center_x - 6, center_y + 6),
+                                 (center_x + 12, center_y - 6)], 4)
+            _FACE_CACHE[key] = template
+        return template
+
+    def _back_template(self) -> pygame.Surface:
+        key = ("back", self.width, self.height)
+        template = _FACE_CACHE.get(key)
+        if template is None:
+            template = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            rect = template.get_rect()
+            
+            self.draw_gradient_rect(template, self.BACK_COLORS[0], self.BACK_COLORS[1], rect, 15)
+            
+            pygame.draw.rect(template, (100, 100, 255), rect, 3, border_radius=15)
+            
+            center_x = rect.centerx
+            center_y = rect.centery
+            
+            diamond_size = min(15, rect.width // 6)
+            diamond_points = [
+                (center_x, center_y - diamond_size),
+                (center_x + diamond_size, center_y),
+                (center_x, center_y + diamond_size),
+                (center_x - diamond_size, center_y)
+            ]
+            pygame.draw.polygon(template, (150, 150, 255), diamond_points)
+            pygame.draw.polygon(template, (200, 200, 255), diamond_points, 2)
+            _FACE_CACHE[key] = template
+        return template
+
+    def blit_ops(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
         animated_x = self.x + self.shake_offset_x
         animated_y = self.y + self.shake_offset_y - self.bounce_offset
         
         scaled_width = int(self.width * self.scale)
         scaled_height = int(self.height * self.scale)
-        scaled_x = animated_x + (self.width - scaled_width) // 2
-        scaled_y = animated_y + (self.height - scaled_height) // 2
-        
-        animated_rect = pygame.Rect(scaled_x, scaled_y, scaled_width, scaled_height)
+        scaled_x = int(animated_x + (self.width - scaled_width) // 2)
+        scaled_y = int(animated_y + (self.height - scaled_height) // 2)
         
+        ops = []
         if self.glow_intensity > 0:
             glow_surface = pygame.Surface((scaled_width + 20, scaled_height + 20), pygame.SRCALPHA)
             glow_color = (255, 255, 100, int(50 * self.glow_intensity))
             pygame.draw.rect(glow_surface, glow_color,
                            (0, 0, scaled_width + 20, scaled_height + 20), border_radius=25)
-            screen.blit(glow_surface, (scaled_x - 10, scaled_y - 10))
+            ops.append((glow_surface, (scaled_x - 10, scaled_y - 10)))
         
         flip_scale_x = abs(math.cos(self.flip_progress * math.pi))
         if flip_scale_x < 0.1:
@@ -163,54 +284,21 @@ class Card:
         
         flip_width = int(scaled_width * flip_scale_x)
         flip_x = scaled_x + (scaled_width - flip_width) // 2
-        flip_rect = pygame.Rect(flip_x, scaled_y, flip_width, scaled_height)
         
         show_front = self.flip_progress > 0.5
         
         if show_front and (self.revealed or self.matched):
-            if self.value in self.colors:
-                color1, color2 = self.colors[self.value]
-            else:
-                color1, color2 = (128, 128, 128), (100, 100, 100)
-            
-            self.draw_gradient_rect(screen, color1, color2, flip_rect, 15)
-            
-            border_color = (255, 255, 255) if not self.matched else (0, 255, 0)
-            pygame.draw.rect(screen, border_color, flip_rect, 3, border_radius=15)
-            
-            center_x = flip_rect.centerx
-            center_y = flip_rect.centery
-            symbol_radius = min(20, flip_width // 4)
-            
-            pygame.draw.circle(screen, (255, 255, 255), (center_x, center_y), symbol_radius + 5)
-            pygame.draw.circle(screen, (0, 0, 0), (center_x, center_y), symbol_radius + 5, 2)
-            
-            if self.value:
-                symbol_color = color2
-                pygame.draw.circle(screen, symbol_color, (center_x, center_y), symbol_radius)
-            
-            if self.matched:
-                pygame.draw.lines(screen, (0, 200, 0), False,
-                                [(center_x - 12, center_y),
-                                 (center_x - 6, center_y + 6),
-                                 (center_x + 12, center_y - 6)], 4)
+            template = self._front_template(self.value, self.matched)
         else:
-            self.draw_gradient_rect(screen, self.back_color[0], self.back_color[1], flip_rect, 15)
-            
-            pygame.draw.rect(screen, (100, 100, 255), flip_rect, 3, border_radius=15)
-            
-            center_x = flip_rect.centerx
-            center_y = flip_rect.centery
-            
-            diamond_size = min(15, flip_width // 6)
-            diamond_points = [
-                (center_x, center_y - diamond_size),
-                (center_x + diamond_size, center_y),
-                (center_x, center_y + diamond_size),
-                (center_x - diamond_size, center_y)
-            ]
-            pygame.draw.polygon(screen, (150, 150, 255), diamond_points)
-            pygame.draw.polygon(screen, (200, 200, 255), diamond_points, 2)
+            template = self._back_template()
+        
+        if template.get_size() != (flip_width, scaled_height):
+            template = pygame.transform.scale(template, (flip_width, scaled_height))
+        ops.append((template, (flip_x, scaled_y)))
+        return ops
+
+    def draw(self, screen):
+        blit_batch(screen, self.blit_ops())
 
     def is_clicked(self, pos: Tuple[int, int]) -> bool:
         return self.rect.collidepoint(pos)
@@ -227,6 +315,7 @@ class Button:
         self.is_hovered = False
         self.scale = 1.0
         self.target_scale = 1.0
+        self._text_cache: Dict[Tuple[pygame.font.Font, str], pygame.Surface] = {}
 
     def update(self, mouse_pos: Tuple[int, int], dt: float):
         was_hovered = self.is_hovered
@@ -265,7 +354,11 @@ class Button:
         border_color = (255, 255, 255) if self.is_hovered else (200, 200, 200)
         pygame.draw.rect(screen, border_color, scaled_rect, 2, border_radius=10)
         
-        text_surface = font.render(self.text, True, (255, 255, 255))
+        key = (font, self.text)
+        text_surface = self._text_cache.get(key)
+        if text_surface is None:
+            text_surface = font.render(self.text, True, (255, 255, 255))
+            self._text_cache[key] = text_surface
         text_rect = text_surface.get_rect(center=scaled_rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -282,6 +375,9 @@ class InputBox:
         self.placeholder = placeholder
         self.active = False
         self.cursor_timer = 0
+        self._text_key = None
+        self._text_surface = None
+        self._text_width = 0
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -296,7 +392,7 @@ class InputBox:
                     if len(self.text) < 10:
                         self.text += event.unicode
 
-    def update(self, dt: float):
+    def update(self, mouse_pos: Tuple[int, int], dt: float):
         self.cursor_timer += dt
 
     def draw(self, screen, font):
@@ -305,16 +401,24 @@ class InputBox:
         
         display_text = self.text if self.text else self.placeholder
         text_color = (255, 255, 255) if self.text else (150, 150, 150)
-        text_surface = font.render(display_text, True, text_color)
+        text_key = (font, display_text, text_color)
+        if text_key != self._text_key:
+            self._text_key = text_key
+            self._text_surface = font.render(display_text, True, text_color)
+            self._text_width = font.size(self.text)[0]
+        text_surface = self._text_surface
         text_y = self.rect.y + (self.rect.height - text_surface.get_height()) // 2
         screen.blit(text_surface, (self.rect.x + 10, text_y))
         
-        if self.active and self.cursor_timer % 1.0 < 0.5:
-            cursor_x = self.rect.x + 10 + font.size(self.text)[0]
+        if self.active and (int(self.cursor_timer * 2) & 1) == 0:
+            cursor_x = self.rect.x + 10 + self._text_width
             cursor_y = self.rect.y + 5
             pygame.draw.line(screen, (255, 255, 255),
                            (cursor_x, cursor_y), (cursor_x, cursor_y + self.rect.height - 10), 2)
 
+class StaleConnectionError(ConnectionError):
+    pass
+
 class NetworkClient:
     def __init__(self, host='localhost', port=8888):
         self.host = host
@@ -322,38 +426,117 @@ class NetworkClient:
         self.player_id = None
         self.room_id = None
         self.game_state_data = None
+        self.state_seq = 0
+        self.state_version = None
         self.polling = False
+        self._poll_stop: Optional[threading.Event] = None
+        self.timeout = 10.0
+        self.recv_size = 65536
+        self._sock: Optional[socket.socket] = None
+        self._sock_lock = threading.Lock()
+        self._request_lines: Dict[str, bytes] = {}
+        self._common_headers = (f"Host: {self.host}:{self.port}\r\n"
+                                "Content-Type: application/json\r\n"
+                                "Connection: keep-alive\r\n").encode()
 
-    def send_http_request(self, path: str, data: Dict) -> Dict:
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_size)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.recv_size)
             sock.connect((self.host, self.port))
-            
-            json_data = json.dumps(data)
-            request = f"POST {path} HTTP/1.1\r\n"
-            request += f"Host: {self.host}:{self.port}\r\n"
-            request += "Content-Type: application/json\r\n"
-            request += f"Content-Length: {len(json_data)}\r\n"
-            request += "Connection: close\r\n"
-            request += "\r\n"
-            request += json_data
-            
-            sock.send(request.encode())
-            
-            response = b""
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _close_socket(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _read_response(self, sock: socket.socket) -> Tuple[bytes, bool]:
+        response = bytearray()
+        header_end = -1
+        while header_end == -1:
+            data = sock.recv(self.recv_size)
+            if not data:
+                if not response:
+                    raise StaleConnectionError("Connection closed before any response bytes")
+                raise ConnectionError("Connection closed before response headers")
+            response += data
+            header_end = response.find(b"\r\n\r\n")
+        
+        header_lines = bytes(response[:header_end]).split(b"\r\n")
+        keep_alive = header_lines[0].startswith(b"HTTP/1.1")
+        content_length = None
+        for line in header_lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                content_length = int(value)
+            elif name == b"connection":
+                keep_alive = value.strip().lower() != b"close"
+        
+        body_start = header_end + 4
+        if content_length is None:
             while True:
-                data = sock.recv(1024)
+                data = sock.recv(self.recv_size)
                 if not data:
                     break
                 response += data
+            return bytes(response[body_start:]), False
+        
+        body_end = body_start + content_length
+        while len(response) < body_end:
+            data = sock.recv(self.recv_size)
+            if not data:
+                raise ConnectionError("Connection closed before response body")
+            response += data
+        return bytes(response[body_start:body_end]), keep_alive
+
+    def _exchange(self, request: bytes) -> bytes:
+        while True:
+            reused = self._sock is not None
+            if not reused:
+                self._sock = self._connect()
+            try:
+                self._sock.sendall(request)
+                body, keep_alive = self._read_response(self._sock)
+            except StaleConnectionError:
+                # The server closed an idle keep-alive socket without answering, so resending is safe
+                self._close_socket()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                # Any other failure leaves the socket mid-response, so it cannot be reused
+                self._close_socket()
+                raise
             
-            sock.close()
+            if not keep_alive:
+                self._close_socket()
+            return body
+
+    def send_http_request(self, path: str, data: Dict) -> Dict:
+        try:
+            request_line = self._request_lines.get(path)
+            if request_line is None:
+                request_line = self._request_lines[path] = f"POST {path} HTTP/1.1\r\n".encode()
+            json_data = json_dumps(data)
+            request = b"".join((request_line, self._common_headers,
+                                b"Content-Length: %d\r\n\r\n" % len(json_data), json_data))
             
-            response_str = response.decode()
-            if "\r\n\r\n" in response_str:
-                headers, body = response_str.split("\r\n\r\n", 1)
-                if body:
-                    return json.loads(body)
+            with self._sock_lock:
+                body = self._exchange(request)
+            
+            if body:
+                return json_loads(body)
             
             return {"success": False, "error": "Invalid response"}
             
@@ -399,49 +582,79 @@ class NetworkClient:
             return {"success": False, "error": "Not connected"}
             
         return self.send_http_request("/game_state", {
-            "player_id": self.player_id
+            "player_id": self.player_id,
+            "since": self.state_version
         })
 
-    def poll_game_state(self):
-        while hasattr(self, 'polling') and self.polling:
+    def poll_game_state(self, stop_event: threading.Event):
+        while not stop_event.is_set():
             try:
                 response = self.get_game_state()
-                if response.get("success"):
-                    self.game_state_data = response.get("game_state")
-                time.sleep(0.05)
+                if response.get("success") and not response.get("unchanged") and not stop_event.is_set():
+                    game_state = response.get("game_state")
+                    if game_state != self.game_state_data:
+                        self.publish_game_state(game_state)
+                stop_event.wait(0.05)
             except Exception as e:
                 logger.error(f"Polling error: {e}")
-                time.sleep(1)
+                stop_event.wait(1)
+
+    def publish_game_state(self, game_state: Dict):
+        self.game_state_data = game_state
+        self.state_version = game_state.get("version")
+        self.state_seq += 1
 
     def start_polling(self):
+        self.stop_polling()
+        self.state_version = None
         self.polling = True
-        self.poll_thread = threading.Thread(target=self.poll_game_state, daemon=True)
+        self._poll_stop = threading.Event()
+        self.poll_thread = threading.Thread(target=self.poll_game_state, args=(self._poll_stop,), daemon=True)
         self.poll_thread.start()
 
     def stop_polling(self):
         self.polling = False
+        if self._poll_stop is not None:
+            self._poll_stop.set()
 
 class MemoryCardGame:
     def __init__(self):
         pygame.init()
         self.width = 1000
         self.height = 700
-        self.screen = pygame.display.set_mode((self.width, self.height))
+        self._cx = self.width // 2
+        try:
+            self.screen = pygame.display.set_mode((self.width, self.height),
+                                                  pygame.SCALED | pygame.DOUBLEBUF, vsync=1)
+        except pygame.error:
+            self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption("Memory Card Game")
         
         self.clock = pygame.time.Clock()
+        self.dt = 0.0
         self.running = True
         self.state = GameState.MENU
         
         self.font_large = pygame.font.Font(None, 48)
         self.font_medium = pygame.font.Font(None, 36)
         self.font_small = pygame.font.Font(None, 24)
+        self._text_cache: "OrderedDict[Tuple, pygame.Surface]" = OrderedDict()
+        self._text_cache_size = 256
+        self._panel_cache: Dict[Tuple, pygame.Surface] = {}
+        self._font_cache: Dict[int, pygame.font.Font] = {}
+        self._font_cache_size = 64
         
         self.client = NetworkClient()
-        self.last_processed_state = None
+        self.last_processed_seq = 0
+        self.game_state_data = None
         
         self.cards = []
+        self._grid = None
         self.players = {}
+        self._player_rows = ()
+        self._score_labels = ()
+        self._waiting_labels = ()
+        self._finished_layout = None
         self.current_player = None
         self.selected_level = "normal"
         
@@ -449,7 +662,14 @@ class MemoryCardGame:
         
         self.status_message = ""
         self.status_timer = 0
+        self._status_cache = ("", None)
         self.bg_time = 0
+        self._bg_seed = pygame.Surface((1, 2)).convert()
+        self._bg_cache: "OrderedDict[Tuple[int, ...], pygame.Surface]" = OrderedDict()
+        self._bg_cache_size = 4
+        self._bg_current: Optional[pygame.Surface] = None
+        self._bg_frame = 0
+        self._bg_refresh_frames = 4
         
         self.last_poll_time = 0
         self.poll_interval = 0.5
@@ -462,6 +682,76 @@ class MemoryCardGame:
         self.normal_level_btn = Button(570, 200, 200, 80, "Normal", (200, 100, 100))
         self.start_btn = Button(400, 500, 200, 50, "Start Game", (180, 70, 70))
         self.back_btn = Button(50, 50, 100, 40, "Back", (120, 120, 120))
+        
+        self._title_surface = self._glow_text(self.font_large, "Memory Card Game",
+                                              (255, 255, 255), (100, 150, 255), 2)
+        self._game_title_surface = self._glow_text(self.font_medium, "Memory Card Game",
+                                                   (255, 255, 255), (100, 200, 255), 2)
+        self._victory_titles: Dict[int, pygame.Surface] = {}
+        
+        self._room_panel = pygame.Surface((320, 80), pygame.SRCALPHA)
+        pygame.draw.rect(self._room_panel, (0, 0, 0, 100), (0, 0, 320, 80), border_radius=15)
+        pygame.draw.rect(self._room_panel, (100, 150, 255, 150), (0, 0, 320, 80), 3, border_radius=15)
+        room_label = self.font_small.render("Room ID:", True, (200, 220, 255))
+        self._room_panel.blit(room_label, (10, 10))
+        
+        self._subtitle_text = self.font_small.render("Challenge your memory with friends!", True, (255, 255, 255))
+        self._hint_text = self.font_small.render("Click 'Back' to return to menu and play again!", True, (255, 255, 255))
+        self._instruction_tints: Dict[Tuple[int, int], pygame.Surface] = {}
+        self._instruction_texts = [
+            self.font_small.render(instruction, True, (255, 255, 255))
+            for instruction in ("Create a new game to select difficulty level",
+                                "Or enter a Room ID above and click Join Game")
+        ]
+        
+        self._state_widgets = {
+            GameState.MENU: (self.create_game_btn, self.join_game_btn, self.room_input),
+            GameState.LEVEL_SELECT: (self.back_btn, self.easy_level_btn, self.normal_level_btn),
+            GameState.WAITING: (self.back_btn,),
+            GameState.PLAYING: (self.back_btn,),
+            GameState.FINISHED: (self.back_btn,),
+        }
+
+    def _glow_text(self, font, text: str, color, glow_color, offset: int) -> pygame.Surface:
+        main = font.render(text, True, color)
+        glow = font.render(text, True, glow_color)
+        surface = pygame.Surface((main.get_width() + offset, main.get_height() + offset), pygame.SRCALPHA)
+        surface.blit(glow, (offset, offset))
+        surface.blit(main, (0, 0))
+        return surface
+
+    def _font(self, size: int) -> pygame.font.Font:
+        font = self._font_cache.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self._font_cache[size] = font
+            if len(self._font_cache) > self._font_cache_size:
+                del self._font_cache[next(iter(self._font_cache))]
+        return font
+
+    def _render(self, font, text: str, color) -> pygame.Surface:
+        key = (font, text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._text_cache[key] = surface
+            if len(self._text_cache) > self._text_cache_size:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surface
+
+    def _panel(self, width: int, height: int, fill_color, border_color=None,
+               border_width: int = 2, radius: int = 10) -> pygame.Surface:
+        key = (width, height, fill_color, border_color, border_width, radius)
+        panel = self._panel_cache.get(key)
+        if panel is None:
+            panel = pygame.Surface((width, height), pygame.SRCALPHA)
+            pygame.draw.rect(panel, fill_color, (0, 0, width, height), border_radius=radius)
+            if border_color:
+                pygame.draw.rect(panel, border_color, (0, 0, width, height), border_width, border_radius=radius)
+            self._panel_cache[key] = panel
+        return panel
 
     def show_status(self, message: str, duration: int = 3000):
         self.status_message = message
@@ -478,39 +768,63 @@ class MemoryCardGame:
         
         start_x = (self.width - (cols * card_width + (cols - 1) * spacing)) // 2
         start_y = 150
-        
-        for i in range(num_cards):
-            row = i // cols
-            col = i % cols
-            x = start_x + col * (card_width + spacing)
-            y = start_y + row * (card_height + spacing)
+        step_x = card_width + spacing
+        step_y = card_height + spacing
+        self._grid = (start_x, start_y, step_x, step_y, cols)
+        
+        self.cards.extend([
+            Card(i, start_x + (i % cols) * step_x, start_y + (i // cols) * step_y, card_width, card_height)
+            for i in range(num_cards)
+        ])
+
+    def card_at(self, pos: Tuple[int, int]) -> Optional[Card]:
+        if not self._grid or not self.cards:
+            return None
+        
+        start_x, start_y, step_x, step_y, cols = self._grid
+        col = (pos[0] - start_x) // step_x
+        row = (pos[1] - start_y) // step_y
+        if col < 0 or col >= cols or row < 0:
+            return None
+        
+        index = row * cols + col
+        if index >= len(self.cards) or not self.cards[index].is_clicked(pos):
+            return None
+        return self.cards[index]
+
+    def _build_player_labels(self):
+        score_labels = []
+        waiting_labels = []
+        for player_id, player_data in self._player_rows:
+            name = player_data['name']
+            waiting_labels.append(self.font_small.render(f"Player: {name}", True, (255, 255, 255)))
             
-            card = Card(i, x, y, card_width, card_height)
-            self.cards.append(card)
+            if player_id == self.client.player_id:
+                name += " (You)"
+            is_turn = player_data['is_turn']
+            color = (255, 255, 100) if is_turn else (255, 255, 255)
+            score_labels.append((is_turn, self.font_small.render(f"{name}: {player_data['score']}", True, color)))
+        
+        self._score_labels = tuple(score_labels)
+        self._waiting_labels = tuple(waiting_labels)
 
     def process_game_state(self, game_state: Dict):
         if not game_state:
             return
             
+        self.game_state_data = game_state
         self.players = game_state.get('players', {})
+        self._player_rows = tuple(self.players.items())
+        self._build_player_labels()
+        self._finished_layout = None
         self.current_player = game_state.get('current_player')
         
         cards_data = game_state.get('cards', [])
         if not self.cards and cards_data:
             self.create_cards_grid(len(cards_data))
         
-        dt = self.clock.get_time() / 1000.0
-        for i, card_data in enumerate(cards_data):
-            if i < len(self.cards):
-                old_revealed = self.cards[i].revealed
-                old_matched = self.cards[i].matched
-                
-                self.cards[i].update(card_data, dt)
-                
-                if card_data.get('matched') and not old_matched:
-                    self.cards[i].match_celebration_timer = 1.0
-                elif card_data.get('revealed') != old_revealed and not card_data.get('revealed'):
-                    self.cards[i].trigger_shake()
+        for card, card_data in zip(self.cards, cards_data):
+            card.update_state(card_data)
         
         if game_state.get('state') == 'in_progress':
             self.state = GameState.PLAYING
@@ -520,7 +834,7 @@ class MemoryCardGame:
             self.state = GameState.WAITING
 
     def handle_events(self):
-        dt = self.clock.get_time() / 1000.0
+        dt = self.dt
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -533,18 +847,12 @@ class MemoryCardGame:
                 self.room_input.handle_event(event)
         
         mouse_pos = pygame.mouse.get_pos()
-        self.create_game_btn.update(mouse_pos, dt)
-        self.join_game_btn.update(mouse_pos, dt)
-        self.easy_level_btn.update(mouse_pos, dt)
-        self.normal_level_btn.update(mouse_pos, dt)
-        self.start_btn.update(mouse_pos, dt)
-        self.back_btn.update(mouse_pos, dt)
-        
-        if self.state == GameState.MENU:
-            self.room_input.update(dt)
+        for widget in self._state_widgets[self.state]:
+            widget.update(mouse_pos, dt)
         
         for card in self.cards:
-            card.update({'value': card.value, 'revealed': card.revealed, 'matched': card.matched}, dt)
+            if card.is_animating:
+                card.tick(dt)
         
         if self.status_timer > 0:
             self.status_timer -= dt * 1000
@@ -604,14 +912,14 @@ class MemoryCardGame:
                 return
             
             if self.current_player == self.client.player_id:
-                for card in self.cards:
-                    if card.is_clicked(pos) and not card.revealed and not card.matched:
-                        response = self.client.reveal_card(card.id)
-                        if response.get("success"):
-                            if 'game_state' in response:
-                                self.process_game_state(response['game_state'])
-                                self.client.game_state_data = response['game_state']
-                        break
+                card = self.card_at(pos)
+                if card and not card.revealed and not card.matched:
+                    response = self.client.reveal_card(card.id)
+                    if response.get("success"):
+                        if 'game_state' in response:
+                            self.process_game_state(response['game_state'])
+                            self.client.publish_game_state(response['game_state'])
+                            self.last_processed_seq = self.client.state_seq
         
         elif self.state == GameState.FINISHED:
             if self.back_btn.is_clicked(pos):
@@ -620,111 +928,115 @@ class MemoryCardGame:
                 self.client.player_id = None
                 self.client.room_id = None
 
+    def _background_surface(self) -> pygame.Surface:
+        t = self.bg_time
+        sin = math.sin
+        r1 = int(30 + 15 * sin(t * 0.5))
+        g1 = int(30 + 15 * sin(t * 0.7))
+        b1 = int(50 + 20 * sin(t * 0.3))
+        
+        r2 = int(20 + 10 * sin(t * 0.4))
+        g2 = int(40 + 15 * sin(t * 0.6))
+        b2 = int(20 + 10 * sin(t * 0.8))
+        
+        key = (r1, g1, b1, r2, g2, b2)
+        background = self._bg_cache.get(key)
+        if background is None:
+            self._bg_seed.set_at((0, 0), (r1, g1, b1))
+            self._bg_seed.set_at((0, 1), (r2, g2, b2))
+            column = pygame.transform.smoothscale(self._bg_seed, (1, self.height))
+            if len(self._bg_cache) >= self._bg_cache_size:
+                _, background = self._bg_cache.popitem(last=False)
+                pygame.transform.scale(column, (self.width, self.height), background)
+            else:
+                background = pygame.transform.scale(column, (self.width, self.height))
+            self._bg_cache[key] = background
+        else:
+            self._bg_cache.move_to_end(key)
+        return background
+
     def draw_animated_background(self):
-        self.bg_time += self.clock.get_time() / 1000.0
-        
-        r1 = int(30 + 15 * math.sin(self.bg_time * 0.5))
-        g1 = int(30 + 15 * math.sin(self.bg_time * 0.7))
-        b1 = int(50 + 20 * math.sin(self.bg_time * 0.3))
-        
-        r2 = int(20 + 10 * math.sin(self.bg_time * 0.4))
-        g2 = int(40 + 15 * math.sin(self.bg_time * 0.6))
-        b2 = int(20 + 10 * math.sin(self.bg_time * 0.8))
-        
-        for y in range(self.height):
-            ratio = y / self.height
-            r = int(r1 * (1 - ratio) + r2 * ratio)
-            g = int(g1 * (1 - ratio) + g2 * ratio)
-            b = int(b1 * (1 - ratio) + b2 * ratio)
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (self.width, y))
-        
+        self.bg_time += self.dt
+        
+        self._bg_frame += 1
+        if self._bg_current is None or self._bg_frame >= self._bg_refresh_frames:
+            self._bg_frame = 0
+            self._bg_current = self._background_surface()
+        self.screen.blit(self._bg_current, (0, 0))
+        
+        t = self.bg_time
+        sin = math.sin
+        width, height = self.width, self.height
+        particle_ops = []
         for i in range(20):
-            particle_time = self.bg_time + i * 0.3
-            x = (50 + i * 45 + math.sin(particle_time * 0.5) * 30) % self.width
-            y = (100 + math.sin(particle_time * 0.3 + i) * 50) % self.height
-            alpha = int(50 + 30 * math.sin(particle_time * 0.7))
-            size = 2 + int(math.sin(particle_time + i) * 1)
+            particle_time = t + i * 0.3
+            x = (50 + i * 45 + sin(particle_time * 0.5) * 30) % width
+            y = (100 + sin(particle_time * 0.3 + i) * 50) % height
+            alpha = int(50 + 30 * sin(particle_time * 0.7))
+            size = 2 + int(sin(particle_time + i) * 1)
             
-            particle_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(particle_surface, (255, 255, 255, alpha), (size, size), size)
-            self.screen.blit(particle_surface, (x - size, y - size))
+            particle_ops.append((_particle_surface(size, alpha), (x - size, y - size)))
+        blit_batch(self.screen, particle_ops)
 
     def draw_menu(self):
         self.draw_animated_background()
         
-        title_text = "Memory Card Game"
-        title_main = self.font_large.render(title_text, True, (255, 255, 255))
-        title_glow = self.font_large.render(title_text, True, (100, 150, 255))
-        
-        title_rect = title_main.get_rect(center=(self.width // 2, 120))
-        glow_rect = title_glow.get_rect(center=(self.width // 2 + 2, 122))
-        
-        self.screen.blit(title_glow, glow_rect)
-        self.screen.blit(title_main, title_rect)
-        
+        title_rect = self._title_surface.get_rect(center=(self._cx + 1, 121))
         subtitle_alpha = int(180 + 75 * math.sin(self.bg_time * 2))
-        subtitle_surface = pygame.Surface((400, 30), pygame.SRCALPHA)
-        subtitle_text = self.font_small.render("Challenge your memory with friends!", True, (255, 255, 255, subtitle_alpha))
-        subtitle_rect = subtitle_text.get_rect(center=(200, 15))
-        subtitle_surface.blit(subtitle_text, subtitle_rect)
-        self.screen.blit(subtitle_surface, (self.width // 2 - 200, 150))
+        self._subtitle_text.set_alpha(subtitle_alpha)
+        subtitle_rect = self._subtitle_text.get_rect(center=(self._cx, 165))
+        blit_batch(self.screen, ((self._title_surface, title_rect),
+                                 (self._subtitle_text, subtitle_rect)))
         
         self.create_game_btn.draw(self.screen, self.font_medium)
         
-        room_bg = pygame.Surface((320, 80), pygame.SRCALPHA)
-        pygame.draw.rect(room_bg, (0, 0, 0, 100), (0, 0, 320, 80), border_radius=15)
-        pygame.draw.rect(room_bg, (100, 150, 255, 150), (0, 0, 320, 80), 3, border_radius=15)
-        self.screen.blit(room_bg, (340, 250 + 40))
-
-        room_label = self.font_small.render("Room ID:", True, (200, 220, 255))
-        self.screen.blit(room_label, (350, 260 + 40))
+        self.screen.blit(self._room_panel, (340, 250 + 40))
 
         self.room_input.draw(self.screen, self.font_small)
 
         self.join_game_btn.draw(self.screen, self.font_medium)
         
         instruction_y = 450
-        instructions = [
-            "Create a new game to select difficulty level",
-            "Or enter a Room ID above and click Join Game"
-        ]
-        
-        for i, instruction in enumerate(instructions):
-            color_intensity = int(200 + 55 * math.sin(self.bg_time + i * 0.5))
-            color = (color_intensity, color_intensity, color_intensity)
-            instruction_surface = self.font_small.render(instruction, True, color)
-            instruction_rect = instruction_surface.get_rect(center=(self.width // 2, instruction_y + i * 25))
-            self.screen.blit(instruction_surface, instruction_rect)
+        instruction_ops = []
+        for i, instruction_text in enumerate(self._instruction_texts):
+            color_intensity = int(200 + 55 * math.sin(self.bg_time + i * 0.5)) & ~3
+            instruction_surface = self._instruction_tints.get((i, color_intensity))
+            if instruction_surface is None:
+                color = (color_intensity, color_intensity, color_intensity)
+                instruction_surface = instruction_text.copy()
+                instruction_surface.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+                self._instruction_tints[(i, color_intensity)] = instruction_surface
+            instruction_rect = instruction_surface.get_rect(center=(self._cx, instruction_y + i * 25))
+            instruction_ops.append((instruction_surface, instruction_rect))
+        blit_batch(self.screen, instruction_ops)
 
     def draw_level_select(self):
         self.draw_animated_background()
         
         self.back_btn.draw(self.screen, self.font_small)
-        
-        title = self.font_large.render("Select Difficulty", True, (255, 255, 255))
-        title_rect = title.get_rect(center=(self.width // 2, 120))
-        self.screen.blit(title, title_rect)
-        
         self.easy_level_btn.draw(self.screen, self.font_medium)
         self.normal_level_btn.draw(self.screen, self.font_medium)
         
+        title = self._render(self.font_large, "Select Difficulty", (255, 255, 255))
+        title_rect = title.get_rect(center=(self._cx, 120))
+        ops = [(title, title_rect)]
+        
         descriptions = [
             ("Easy Mode", ["All cards shown for 3 ", "seconds at the start", "of the game"], (150, 255, 150), 330),
             ("Normal Mode", ["No card previews", "Classic memory", "game"], (255, 150, 150), 570)
         ]
 
         for title_text, desc_lines, color, x_pos in descriptions:
-            desc_bg = pygame.Surface((180, 120), pygame.SRCALPHA)
-            pygame.draw.rect(desc_bg, (0, 0, 0, 120), (0, 0, 180, 120), border_radius=10)
-            pygame.draw.rect(desc_bg, color + (100,), (0, 0, 180, 120), 2, border_radius=10)
-            self.screen.blit(desc_bg, (x_pos, 290))
+            desc_bg = self._panel(180, 120, (0, 0, 0, 120), color + (100,))
+            ops.append((desc_bg, (x_pos, 290)))
             
-            title_surface = self.font_small.render(title_text, True, (255, 255, 255))
-            self.screen.blit(title_surface, (x_pos + 10, 300))
+            title_surface = self._render(self.font_small, title_text, (255, 255, 255))
+            ops.append((title_surface, (x_pos + 10, 300)))
             
             for i, line in enumerate(desc_lines):
-                line_surface = self.font_small.render(line, True, color)
-                self.screen.blit(line_surface, (x_pos + 10, 325 + i * 25))
+                line_surface = self._render(self.font_small, line, color)
+                ops.append((line_surface, (x_pos + 10, 325 + i * 25)))
+        blit_batch(self.screen, ops)
 
     def draw_waiting(self):
         self.draw_animated_background()
@@ -732,41 +1044,36 @@ class MemoryCardGame:
         self.back_btn.draw(self.screen, self.font_small)
         
         waiting_scale = 1.0 + 0.1 * math.sin(self.bg_time * 3)
-        title_font = pygame.font.Font(None, int(48 * waiting_scale))
-        title = title_font.render("Waiting for Players", True, (255, 255, 255))
-        title_rect = title.get_rect(center=(self.width // 2, 150))
-        self.screen.blit(title, title_rect)
+        title_font = self._font(int(48 * waiting_scale))
+        title = self._render(title_font, "Waiting for Players", (255, 255, 255))
+        title_rect = title.get_rect(center=(self._cx, 150))
+        ops = [(title, title_rect)]
         
         if self.client.room_id:
-            room_bg = pygame.Surface((300, 60), pygame.SRCALPHA)
-            pygame.draw.rect(room_bg, (0, 0, 0, 150), (0, 0, 300, 60), border_radius=15)
-            pygame.draw.rect(room_bg, (100, 255, 100, 200), (0, 0, 300, 60), 3, border_radius=15)
-            self.screen.blit(room_bg, (self.width // 2 - 150, 200))
+            room_bg = self._panel(300, 60, (0, 0, 0, 150), (100, 255, 100, 200), 3, 15)
+            ops.append((room_bg, (self._cx - 150, 200)))
             
-            room_text = self.font_medium.render(f"Room ID: {self.client.room_id}", True, (255, 255, 255))
-            room_rect = room_text.get_rect(center=(self.width // 2, 230))
-            self.screen.blit(room_text, room_rect)
+            room_text = self._render(self.font_medium, f"Room ID: {self.client.room_id}", (255, 255, 255))
+            room_rect = room_text.get_rect(center=(self._cx, 230))
+            ops.append((room_text, room_rect))
         
-        if hasattr(self, 'game_state_data') and self.game_state_data:
+        if self.game_state_data:
             level = self.game_state_data.get('level', 'normal')
-            level_bg = pygame.Surface((200, 30), pygame.SRCALPHA)
-            pygame.draw.rect(level_bg, (100, 100, 255, 100), (0, 0, 200, 30), border_radius=10)
-            self.screen.blit(level_bg, (self.width // 2 - 100, 270))
+            level_bg = self._panel(200, 30, (100, 100, 255, 100))
+            ops.append((level_bg, (self._cx - 100, 270)))
             
-            level_text = self.font_small.render(f"Difficulty: {level.title()}", True, (200, 200, 255))
-            level_rect = level_text.get_rect(center=(self.width // 2, 285))
-            self.screen.blit(level_text, level_rect)
+            level_text = self._render(self.font_small, f"Difficulty: {level.title()}", (200, 200, 255))
+            level_rect = level_text.get_rect(center=(self._cx, 285))
+            ops.append((level_text, level_rect))
         
         y_offset = 320
-        for i, (player_id, player_data) in enumerate(self.players.items()):
-            player_bg = pygame.Surface((250, 35), pygame.SRCALPHA)
+        for i, player_text in enumerate(self._waiting_labels):
             color_alpha = int(100 + 50 * math.sin(self.bg_time + i))
-            pygame.draw.rect(player_bg, (50, 150, 200, color_alpha), (0, 0, 250, 35), border_radius=8)
-            self.screen.blit(player_bg, (self.width // 2 - 125, y_offset - 5))
+            player_bg = self._panel(250, 35, (50, 150, 200, color_alpha), radius=8)
+            ops.append((player_bg, (self._cx - 125, y_offset - 5)))
             
-            player_text = self.font_small.render(f"Player: {player_data['name']}", True, (255, 255, 255))
-            player_rect = player_text.get_rect(center=(self.width // 2, y_offset + 10))
-            self.screen.blit(player_text, player_rect)
+            player_rect = player_text.get_rect(center=(self._cx, y_offset + 10))
+            ops.append((player_text, player_rect))
             y_offset += 45
         
         status_y = 420
@@ -774,18 +1081,19 @@ class MemoryCardGame:
             pulse = 0.8 + 0.2 * math.sin(self.bg_time * 4)
             waiting_color = (int(200 * pulse), int(200 * pulse), int(200 * pulse))
             
-            instruction = self.font_small.render("Waiting for another player to join...", True, waiting_color)
-            instruction_rect = instruction.get_rect(center=(self.width // 2, status_y))
-            self.screen.blit(instruction, instruction_rect)
+            instruction = self._render(self.font_small, "Waiting for another player to join...", waiting_color)
+            instruction_rect = instruction.get_rect(center=(self._cx, status_y))
+            ops.append((instruction, instruction_rect))
             
-            share_text = self.font_small.render("Share the Room ID with a friend!", True, (150, 150, 255))
-            share_rect = share_text.get_rect(center=(self.width // 2, status_y + 30))
-            self.screen.blit(share_text, share_rect)
+            share_text = self._render(self.font_small, "Share the Room ID with a friend!", (150, 150, 255))
+            share_rect = share_text.get_rect(center=(self._cx, status_y + 30))
+            ops.append((share_text, share_rect))
         else:
             ready_color = (100, 255, 100)
-            instruction = self.font_small.render("Game will start automatically when both players are ready!", True, ready_color)
-            instruction_rect = instruction.get_rect(center=(self.width // 2, status_y))
-            self.screen.blit(instruction, instruction_rect)
+            instruction = self._render(self.font_small, "Game will start automatically when both players are ready!", ready_color)
+            instruction_rect = instruction.get_rect(center=(self._cx, status_y))
+            ops.append((instruction, instruction_rect))
+        blit_batch(self.screen, ops)
 
     def draw_game(self):
         bg_r = int(20 + 10 * math.sin(self.bg_time * 0.2))
@@ -795,47 +1103,29 @@ class MemoryCardGame:
         
         self.back_btn.draw(self.screen, self.font_small)
         
-        title = self.font_medium.render("Memory Card Game", True, (255, 255, 255))
-        title_glow = self.font_medium.render("Memory Card Game", True, (100, 200, 255))
-        self.screen.blit(title_glow, (self.width // 2 - 98, 22))
-        self.screen.blit(title, (self.width // 2 - 100, 20))
+        ops = [(self._game_title_surface, (self._cx - 100, 20))]
         
-        if hasattr(self, 'game_state_data') and self.game_state_data:
+        if self.game_state_data:
             level = self.game_state_data.get('level', 'normal')
-            level_bg = pygame.Surface((120, 25), pygame.SRCALPHA)
-            pygame.draw.rect(level_bg, (100, 100, 255, 150), (0, 0, 120, 25), border_radius=8)
-            self.screen.blit(level_bg, (740, 20))
+            level_bg = self._panel(120, 25, (100, 100, 255, 150), radius=8)
+            ops.append((level_bg, (740, 20)))
             
-            level_text = self.font_small.render(f"Level: {level.title()}", True, (200, 200, 255))
-            self.screen.blit(level_text, (750, 27))
+            level_text = self._render(self.font_small, f"Level: {level.title()}", (200, 200, 255))
+            ops.append((level_text, (750, 27)))
         
         x_offset = 50
-        for player_id, player_data in self.players.items():
-            name = player_data['name']
-            score = player_data['score']
-            is_turn = player_data['is_turn']
-            
-            if player_id == self.client.player_id:
-                name += " (You)"
-            
-            score_width = 180
-            score_bg = pygame.Surface((score_width, 35), pygame.SRCALPHA)
-            
+        turn_level = int(255 * (0.7 + 0.3 * math.sin(self.bg_time * 6)))
+        for is_turn, score_text in self._score_labels:
             if is_turn:
-                turn_pulse = 0.7 + 0.3 * math.sin(self.bg_time * 6)
-                bg_color = (int(255 * turn_pulse), int(255 * turn_pulse), 100, 150)
+                bg_color = (turn_level, turn_level, 100, 150)
                 border_color = (255, 255, 100)
             else:
                 bg_color = (50, 50, 100, 100)
                 border_color = (100, 100, 150)
             
-            pygame.draw.rect(score_bg, bg_color, (0, 0, score_width, 35), border_radius=10)
-            pygame.draw.rect(score_bg, border_color, (0, 0, score_width, 35), 2, border_radius=10)
-            self.screen.blit(score_bg, (x_offset, 60))
-            
-            color = (255, 255, 100) if is_turn else (255, 255, 255)
-            score_text = self.font_small.render(f"{name}: {score}", True, color)
-            self.screen.blit(score_text, (x_offset + 10, 70))
+            score_bg = self._panel(180, 35, bg_color, border_color)
+            ops.append((score_bg, (x_offset, 60)))
+            ops.append((score_text, (x_offset + 10, 70)))
             x_offset += 200
         
         if self.current_player:
@@ -849,17 +1139,16 @@ class MemoryCardGame:
                 turn_text = f" {current_name}'s turn"
                 color = (255, 100, 100)
             
-            turn_bg = pygame.Surface((250, 30), pygame.SRCALPHA)
-            pygame.draw.rect(turn_bg, (0, 0, 0, 120), (0, 0, 250, 30), border_radius=10)
-            pygame.draw.rect(turn_bg, color + (150,), (0, 0, 250, 30), 2, border_radius=10)
-            self.screen.blit(turn_bg, (self.width // 2 - 125, 105))
+            turn_bg = self._panel(250, 30, (0, 0, 0, 120), color + (150,))
+            ops.append((turn_bg, (self._cx - 125, 105)))
             
-            turn_surface = self.font_small.render(turn_text, True, color)
-            turn_rect = turn_surface.get_rect(center=(self.width // 2, 120))
-            self.screen.blit(turn_surface, turn_rect)
+            turn_surface = self._render(self.font_small, turn_text, color)
+            turn_rect = turn_surface.get_rect(center=(self._cx, 120))
+            ops.append((turn_surface, turn_rect))
         
         for card in self.cards:
-            card.draw(self.screen)
+            ops.extend(card.blit_ops())
+        blit_batch(self.screen, ops)
 
     def draw_finished(self):
         self.draw_animated_background()
@@ -867,97 +1156,102 @@ class MemoryCardGame:
         self.back_btn.draw(self.screen, self.font_small)
         
         victory_scale = 1.0 + 0.15 * math.sin(self.bg_time * 2)
-        victory_font = pygame.font.Font(None, int(48 * victory_scale))
-        title = victory_font.render("Game Finished!", True, (255, 255, 100))
-        title_rect = title.get_rect(center=(self.width // 2, 150))
+        victory_size = int(48 * victory_scale)
+        title = self._victory_titles.get(victory_size)
+        if title is None:
+            title = self._glow_text(self._font(victory_size), "Game Finished!", (255, 255, 100), (255, 200, 0), 3)
+            self._victory_titles[victory_size] = title
+        title_pos = (self._cx - (title.get_width() - 3) // 2, 150 - (title.get_height() - 3) // 2)
+        ops = [(title, title_pos)]
+        
+        if self._finished_layout is None:
+            self._finished_layout = self._build_finished_layout()
+        rows, y_offset = self._finished_layout
+        
+        for i, (result_bg, result_pos, score_text, score_rect) in enumerate(rows):
+            if i == 0:
+                t = self.bg_time
+                sin, cos = math.sin, math.cos
+                sparkle_alpha = int(100 + 100 * sin(t * 8))
+                sparkle_color = (255, 255, 255, sparkle_alpha)
+                result_bg = result_bg.copy()
+                t4, t6 = t * 4, t * 6
+                for j in range(5):
+                    sparkle_x = 20 + j * 70 + int(sin(t4 + j) * 10)
+                    sparkle_y = 25 + int(cos(t6 + j) * 5)
+                    pygame.draw.circle(result_bg, sparkle_color, (sparkle_x, sparkle_y), 2)
+            ops.append((result_bg, result_pos))
+            ops.append((score_text, score_rect))
         
-        title_glow = victory_font.render("Game Finished!", True, (255, 200, 0))
-        glow_rect = title_glow.get_rect(center=(self.width // 2 + 3, 153))
-        self.screen.blit(title_glow, glow_rect)
-        self.screen.blit(title, title_rect)
+        hint_alpha = int(150 + 105 * math.sin(self.bg_time * 3))
+        self._hint_text.set_alpha(hint_alpha)
+        hint_rect = self._hint_text.get_rect(center=(self._cx, y_offset + 32))
+        ops.append((self._hint_text, hint_rect))
+        blit_batch(self.screen, ops)
+
+    def _build_finished_layout(self):
+        result_width = 400
+        result_x = self._cx - result_width // 2
+        ranking = sorted(self._player_rows, key=lambda row: row[1]['score'], reverse=True)
         
+        rows = []
         y_offset = 250
-        scores = [(pid, data['score']) for pid, data in self.players.items()]
-        scores.sort(key=lambda x: x[1], reverse=True)
-        
-        for i, (player_id, score) in enumerate(scores):
-            name = self.players[player_id]['name']
+        for i, (player_id, player_data) in enumerate(ranking):
+            name = player_data['name']
+            score = player_data['score']
             if player_id == self.client.player_id:
                 name += " (You)"
             
-            result_width = 400
-            result_bg = pygame.Surface((result_width, 50), pygame.SRCALPHA)
-            
             if i == 0:
                 bg_color = (255, 215, 0, 150)
                 border_color = (255, 255, 0)
                 position = "Winner!"
                 text_color = (255, 255, 100)
-                sparkle_alpha = int(100 + 100 * math.sin(self.bg_time * 8))
-                sparkle_color = (255, 255, 255, sparkle_alpha)
             else:
                 bg_color = (100, 100, 150, 100)
                 border_color = (150, 150, 200)
                 position = f"Rank {i + 1}"
                 text_color = (255, 255, 255)
             
-            pygame.draw.rect(result_bg, bg_color, (0, 0, result_width, 50), border_radius=15)
-            pygame.draw.rect(result_bg, border_color, (0, 0, result_width, 50), 3, border_radius=15)
-            
-            if i == 0:
-                for j in range(5):
-                    sparkle_x = 20 + j * 70 + int(math.sin(self.bg_time * 4 + j) * 10)
-                    sparkle_y = 25 + int(math.cos(self.bg_time * 6 + j) * 5)
-                    pygame.draw.circle(result_bg, sparkle_color, (sparkle_x, sparkle_y), 2)
-            
-            self.screen.blit(result_bg, (self.width // 2 - result_width // 2, y_offset))
-            
-            score_text = self.font_medium.render(f"{name}: {score} pairs - {position}", True, text_color)
-            score_rect = score_text.get_rect(center=(self.width // 2, y_offset + 25))
-            self.screen.blit(score_text, score_rect)
+            result_bg = self._panel(result_width, 50, bg_color, border_color, 3, 15)
+            score_text = self._render(self.font_medium, f"{name}: {score} pairs - {position}", text_color)
+            score_rect = score_text.get_rect(center=(self._cx, y_offset + 25))
+            rows.append((result_bg, (result_x, y_offset), score_text, score_rect))
             y_offset += 70
         
-        hint_alpha = int(150 + 105 * math.sin(self.bg_time * 3))
-        hint_surface = pygame.Surface((350, 25), pygame.SRCALPHA)
-        hint_text = self.font_small.render("Click 'Back' to return to menu and play again!", True, (255, 255, 255, hint_alpha))
-        hint_rect = hint_text.get_rect(center=(175, 12))
-        hint_surface.blit(hint_text, hint_rect)
-        self.screen.blit(hint_surface, (self.width // 2 - 175, y_offset + 20))
+        return rows, y_offset
 
     def draw_status(self):
         if self.status_message and self.status_timer > 0:
-            status_alpha = min(255, self.status_timer // 10)
-            status_scale = 1.0 + 0.1 * math.sin(self.bg_time * 6)
-            
-            status_font = pygame.font.Font(None, int(24 * status_scale))
-            status_surface = status_font.render(self.status_message, True, (255, 255, 100))
-            status_rect = status_surface.get_rect(center=(self.width // 2, self.height - 50))
-            
-            bg_width = status_rect.width + 40
-            bg_height = status_rect.height + 20
-            bg_rect = pygame.Rect(status_rect.centerx - bg_width // 2,
-                                status_rect.centery - bg_height // 2,
-                                bg_width, bg_height)
-            
-            glow_surface = pygame.Surface((bg_width + 20, bg_height + 20), pygame.SRCALPHA)
-            pygame.draw.rect(glow_surface, (255, 255, 100, 50),
-                           (0, 0, bg_width + 20, bg_height + 20), border_radius=15)
-            self.screen.blit(glow_surface, (bg_rect.x - 10, bg_rect.y - 10))
-            
-            pygame.draw.rect(self.screen, (50, 50, 50, 200), bg_rect, border_radius=10)
-            pygame.draw.rect(self.screen, (255, 255, 100), bg_rect, 2, border_radius=10)
+            status_alpha = min(255, int(self.status_timer // 10))
             
+            if self._status_cache[0] != self.status_message:
+                self._status_cache = (self.status_message, self._build_status_surface(self.status_message))
+            status_surface = self._status_cache[1]
+            status_surface.set_alpha(status_alpha)
+            status_rect = status_surface.get_rect(center=(self._cx, self.height - 50))
             self.screen.blit(status_surface, status_rect)
-            self.status_timer -= self.clock.get_time()
+            self.status_timer -= self.dt * 1000
+
+    def _build_status_surface(self, message: str) -> pygame.Surface:
+        text_surface = self.font_small.render(message, True, (255, 255, 100))
+        text_width, text_height = text_surface.get_size()
+        bg_rect = pygame.Rect(10, 10, text_width + 40, text_height + 20)
+        
+        surface = pygame.Surface((bg_rect.width + 20, bg_rect.height + 20), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (255, 255, 100, 50), surface.get_rect(), border_radius=15)
+        pygame.draw.rect(surface, (50, 50, 50, 255), bg_rect, border_radius=10)
+        pygame.draw.rect(surface, (255, 255, 100), bg_rect, 2, border_radius=10)
+        surface.blit(text_surface, (bg_rect.x + 20, bg_rect.y + 10))
+        return surface
 
     def run(self):
         while self.running:
             self.handle_events()
             
-            if self.client.polling and self.client.game_state_data:
-                if self.client.game_state_data != self.last_processed_state:
-                    self.process_game_state(self.client.game_state_data)
-                    self.last_processed_state = self.client.game_state_data
+            if self.client.polling and self.client.state_seq != self.last_processed_seq:
+                self.last_processed_seq = self.client.state_seq
+                self.process_game_state(self.client.game_state_data)
 
             if self.state == GameState.MENU:
                 self.draw_menu()
@@ -973,7 +1267,7 @@ class MemoryCardGame:
             self.draw_status()
             
             pygame.display.flip()
-            self.clock.tick(60)
+            self.dt = self.clock.tick(60 if self.state == GameState.PLAYING else 30) / 1000.0
         
         pygame.quit()
         sys.exit()
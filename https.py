@@ -1,24 +1,47 @@
 # http.py
 import json
 import uuid
-import string
+import os
 import random
 import time
 import threading
 from datetime import datetime
+from email.utils import formatdate
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, List
 import logging
 
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    json_loads = json.loads
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Room IDs use 32 unambiguous characters so each random byte maps evenly via b & 31
+_ROOM_ID_ALPHABET = b"ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+_ROOM_ID_TABLE = bytes(_ROOM_ID_ALPHABET[b & 31] for b in range(256))
+@lru_cache(maxsize=None)
+def _card_values(pairs: int) -> tuple:
+    return tuple(f"card_{i}" for i in range(pairs))
+
 class GameState(Enum):
     WAITING_FOR_PLAYERS = "waiting"
     IN_PROGRESS = "in_progress"
     FINISHED = "finished"
 
 class Card:
+    __slots__ = ('id', 'value', 'is_revealed', 'is_matched')
+
     def __init__(self, card_id: int, value: str):
         self.id = card_id
         self.value = value
@@ -26,6 +49,8 @@ class Card:
         self.is_matched = False
 
 class Player:
+    __slots__ = ('id', 'name', 'score', 'is_turn')
+
     def __init__(self, player_id: str, name: str = ""):
         self.id = player_id
         self.name = name or f"Player_{player_id[:8]}"
@@ -37,25 +62,66 @@ class GameSession:
         self.room_id = room_id
         self.level = level
         self.players: Dict[str, Player] = {}
+        self._next_player: Dict[str, str] = {}
         self.cards: List[Card] = []
         self.state = GameState.WAITING_FOR_PLAYERS
         self.current_player_id = None
         self.revealed_cards = []
         self.created_at = datetime.now()
         self.last_activity = datetime.now()
+        self.version = 0
+        self._hide_at = 0.0
+        self._pending_hides: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._state_json_cache = (-1, None)
         self.initialize_cards()
 
     def initialize_cards(self, pairs=8):
-        values = [f"card_{i}" for i in range(pairs)]
-        all_cards = values + values
-        random.shuffle(all_cards)
-        self.cards = [Card(i, value) for i, value in enumerate(all_cards)]
+        indices = list(range(pairs)) * 2
+        random.shuffle(indices)
+        values = _card_values(pairs)
+        self.cards = [Card(i, values[v]) for i, v in enumerate(indices)]
+        # Hidden, revealed and matched JSON for each card; only the card's flags change after dealing
+        self._card_json = [
+            (b'{"id": %d, "revealed": false, "value": null, "matched": false}' % card.id,
+             b'{"id": %d, "revealed": true, "value": "%s", "matched": false}' % (card.id, card.value.encode()),
+             b'{"id": %d, "revealed": true, "value": "%s", "matched": true}' % (card.id, card.value.encode()))
+            for card in self.cards
+        ]
+
+    def mark_changed(self):
+        self.version += 1
+
+    def schedule_hide(self, cards: List[Card], delay: float, switch_turn: bool = False):
+        with self._pending_lock:
+            self._pending_hides.append((time.monotonic() + delay, cards, switch_turn))
+            self._hide_at = min(deadline for deadline, _, _ in self._pending_hides)
+
+    def apply_pending_hide(self):
+        if not self._hide_at or time.monotonic() < self._hide_at:
+            return
+        with self._pending_lock:
+            now = time.monotonic()
+            due = sorted((entry for entry in self._pending_hides if entry[0] <= now), key=lambda entry: entry[0])
+            if not due:
+                return
+            self._pending_hides = [entry for entry in self._pending_hides if entry[0] > now]
+            self._hide_at = min((deadline for deadline, _, _ in self._pending_hides), default=0.0)
+            for _, cards, switch_turn in due:
+                for card in cards:
+                    if not card.is_matched:
+                        card.is_revealed = False
+                if switch_turn:
+                    self.switch_turn()
+            self.mark_changed()
 
     def add_player(self, player: Player) -> bool:
         if len(self.players) < 4:
             self.players[player.id] = player
+            self.link_players()
             if len(self.players) >= 2:
                 self.start_game()
+            self.mark_changed()
             return True
         return False
 
@@ -69,16 +135,10 @@ class GameSession:
         if self.level == "easy":
             for card in self.cards:
                 card.is_revealed = True
-
-            def hide_all_cards():
-                time.sleep(3)
-                for card in self.cards:
-                    if not card.is_matched:
-                        card.is_revealed = False
-
-            threading.Thread(target=hide_all_cards, daemon=True).start()
+            self.schedule_hide(list(self.cards), 3)
 
     def reveal_card(self, card_id: int, player_id: str) -> Dict:
+        self.apply_pending_hide()
         if self.current_player_id != player_id or self.state != GameState.IN_PROGRESS:
             return {"success": False, "message": "Not your turn"}
 
@@ -102,31 +162,31 @@ class GameSession:
             else:
                 result["match"] = False
                 result["continue_turn"] = False
-                revealed_copy = list(self.revealed_cards)
+                self.schedule_hide(self.revealed_cards, 1.5, switch_turn=True)
                 self.revealed_cards = []
-                
-
-                def hide_cards_later():
-                    time.sleep(1.5)
-                    for c in revealed_copy:
-                        c.is_revealed = False
-                    self.switch_turn()
-
-                threading.Thread(target=hide_cards_later, daemon=True).start()
 
             if all(card.is_matched for card in self.cards):
                 self.finish_game()
 
         self.last_activity = datetime.now()
+        self.mark_changed()
         return result
 
+    def link_players(self):
+        player_ids = list(self.players)
+        self._next_player = dict(zip(player_ids, player_ids[1:] + player_ids[:1]))
+
     def switch_turn(self):
-        player_ids = list(self.players.keys())
-        current_index = player_ids.index(self.current_player_id)
-        next_index = (current_index + 1) % len(player_ids)
-        self.players[self.current_player_id].is_turn = False
-        self.current_player_id = player_ids[next_index]
-        self.players[self.current_player_id].is_turn = True
+        current = self.players.get(self.current_player_id)
+        if current is not None:
+            current.is_turn = False
+        next_id = self._next_player.get(self.current_player_id)
+        if next_id is None:
+            if not self.players:
+                return
+            next_id = next(iter(self.players))
+        self.current_player_id = next_id
+        self.players[next_id].is_turn = True
 
     def finish_game(self):
         self.state = GameState.FINISHED
@@ -134,9 +194,23 @@ class GameSession:
         scores.sort(key=lambda x: x[1], reverse=True)
         return scores
 
-    def get_game_state(self) -> Dict:
+    def get_game_state_bytes(self) -> bytes:
+        self.apply_pending_hide()
+        version, state_json = self._state_json_cache
+        if version != self.version:
+            version = self.version
+            cards_json = b', '.join([
+                card_json[2] if card.is_matched else card_json[card.is_revealed]
+                for card, card_json in zip(self.cards, self._card_json)
+            ])
+            state_json = json_dumps(self.build_state_fields())[:-1] + b', "cards": [' + cards_json + b']}'
+            self._state_json_cache = (version, state_json)
+        return state_json
+
+    def build_state_fields(self) -> Dict:
         return {
             "room_id": self.room_id,
+            "version": self.version,
             "level": self.level,
             "state": self.state.value,
             "players": {
@@ -146,63 +220,65 @@ class GameSession:
                     "is_turn": player.is_turn
                 } for pid, player in self.players.items()
             },
-            "cards": [
-                {
-                    "id": card.id,
-                    "revealed": card.is_revealed or card.is_matched,
-                    "value": card.value if (card.is_revealed or card.is_matched) else None,
-                    "matched": card.is_matched
-                } for card in self.cards
-            ],
             "current_player": self.current_player_id
         }
 
+_RESPONSE_TEMPLATES: Dict[tuple, bytes] = {}
+_date_cache = [0, b'']
+
+def _http_date() -> bytes:
+    now = int(time.time())
+    if now != _date_cache[0]:
+        _date_cache[1] = formatdate(now, usegmt=True).encode()
+        _date_cache[0] = now
+    return _date_cache[1]
+
 class GameServer:
     def __init__(self):
         self.games: Dict[str, GameSession] = {}
         self.client_to_game: Dict[str, str] = {}
 
     def _response(self, kode=200, message='OK', body=b'', headers=None):
-        if headers is None:
-            headers = {}
         if not isinstance(body, bytes):
-            body = json.dumps(body).encode()
-        tanggal = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
-        lines = [
-            f"HTTP/1.1 {kode} {message}\r\n",
-            f"Date: {tanggal}\r\n",
-            "Connection: close\r\n",
-            f"Content-Length: {len(body)}\r\n",
-            "Content-Type: application/json\r\n",
-        ] + [f"{k}: {v}\r\n" for k, v in headers.items()] + ["\r\n"]
-        return "".join(lines).encode() + body
+            body = json_dumps(body)
+        template = _RESPONSE_TEMPLATES.get((kode, message))
+        if template is None:
+            template = (f"HTTP/1.1 {kode} {message}\r\n"
+                        "Date: %b\r\n"
+                        "Content-Length: %d\r\n"
+                        "Content-Type: application/json\r\n").encode()
+            _RESPONSE_TEMPLATES[(kode, message)] = template
+        head = template % (_http_date(), len(body))
+        if headers:
+            head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode()
+        return head + b"\r\n" + body
+
+    def _with_game_state(self, payload, game: GameSession) -> bytes:
+        # Splice the session's cached state JSON in as the last key of the payload
+        return json_dumps(payload)[:-1] + b', "game_state": ' + game.get_game_state_bytes() + b'}'
 
     def proses(self, raw_data, connection):
-        requests = raw_data.split("\r\n")
-        lines = requests[0]
-        j = lines.split(" ")
+        head, _, body = raw_data.partition(b"\r\n\r\n")
+        first_line = head.partition(b"\r\n")[0]
+        j = first_line.split(b" ", 2)
         try:
             method = j[0].upper().strip()
-            if method == 'POST':
-                path = j[1].strip()
-                body_start = False
-                body = ""
-                for line in requests:
-                    if body_start:
-                        body = line
-                        break
-                    if line == "":
-                        body_start = True
-                
-                return self._handle_post(path, body, connection)
+            if method == b'POST':
+                path = j[1].strip().decode('latin-1')
+                response = self._handle_post(path, body, connection)
             else:
-                return self._response(400, 'Bad Request', {'error': 'Only POST method supported'})
+                response = self._response(400, 'Bad Request', {'error': 'Only POST method supported'})
         except IndexError:
-            return self._response(400, 'Bad Request', {'error': 'Invalid request'})
+            response = self._response(400, 'Bad Request', {'error': 'Invalid request'})
+        # HTTP/1.1 keeps the connection open by default; echo a client's request to close it
+        if b'connection: close' in head.lower():
+            status_line, _, rest = response.partition(b"\r\n")
+            response = status_line + b"\r\nConnection: close\r\n" + rest
+        return response
 
     def _handle_post(self, path, body, connection):
         try:
-            data = json.loads(body) if body else {}
+            data = json_loads(body) if body else {}
             
             if path == '/create_room':
                 level = data.get('level', 'normal')
@@ -211,12 +287,11 @@ class GameServer:
                 player_id = str(uuid.uuid4())
                 player = Player(player_id, player_name)
                 self.join_room(room_id, player)
-                return self._response(200, 'OK', {
+                return self._response(200, 'OK', self._with_game_state({
                     'success': True,
                     'room_id': room_id,
-                    'player_id': player_id,
-                    'game_state': self.games[room_id].get_game_state()
-                })
+                    'player_id': player_id
+                }, self.games[room_id]))
                 
             elif path == '/join_room':
                 room_id = data.get('room_id')
@@ -225,12 +300,11 @@ class GameServer:
                     player_id = str(uuid.uuid4())
                     player = Player(player_id, player_name)
                     if self.join_room(room_id, player):
-                        return self._response(200, 'OK', {
+                        return self._response(200, 'OK', self._with_game_state({
                             'success': True,
                             'room_id': room_id,
-                            'player_id': player_id,
-                            'game_state': self.games[room_id].get_game_state()
-                        })
+                            'player_id': player_id
+                        }, self.games[room_id]))
                     else:
                         return self._response(400, 'Bad Request', {'error': 'Room is full'})
                 else:
@@ -242,8 +316,7 @@ class GameServer:
                 if room_id and room_id in self.games:
                     card_id = data.get('card_id')
                     result = self.games[room_id].reveal_card(card_id, player_id)
-                    result['game_state'] = self.games[room_id].get_game_state()
-                    return self._response(200, 'OK', result)
+                    return self._response(200, 'OK', self._with_game_state(result, self.games[room_id]))
                 else:
                     return self._response(400, 'Bad Request', {'error': 'Not in a game'})
                     
@@ -251,10 +324,15 @@ class GameServer:
                 player_id = data.get('player_id')
                 room_id = self.client_to_game.get(player_id)
                 if room_id and room_id in self.games:
-                    return self._response(200, 'OK', {
-                        'success': True,
-                        'game_state': self.games[room_id].get_game_state()
-                    })
+                    game = self.games[room_id]
+                    game.apply_pending_hide()
+                    if data.get('since') == game.version:
+                        return self._response(200, 'OK', {
+                            'success': True,
+                            'unchanged': True,
+                            'version': game.version
+                        })
+                    return self._response(200, 'OK', self._with_game_state({'success': True}, game))
                 else:
                     return self._response(400, 'Bad Request', {'error': 'Not in a game'})
                     
@@ -268,7 +346,10 @@ class GameServer:
             return self._response(500, 'Internal Server Error', {'error': str(e)})
 
     def create_room(self, level="normal") -> str:
-        room_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        while True:
+            room_id = os.urandom(6).translate(_ROOM_ID_TABLE).decode('ascii')
+            if room_id not in self.games:
+                break
         self.games[room_id] = GameSession(room_id, level=level)
         logger.info(f"Created room: {room_id} with level: {level}")
         return room_id
@@ -289,6 +370,8 @@ class GameServer:
                 game = self.games[room_id]
                 if player_id in game.players:
                     del game.players[player_id]
+                    game.link_players()
+                    game.mark_changed()
                     if len(game.players) == 0:
                         del self.games[room_id]
                         logger.info(f"Removed empty room: {room_id}")
@@ -1,7 +1,7 @@
-import socket
+import asyncio
+import re
 import threading
 import json
-import hashlib
 from urllib.parse import parse_qs
 
 # A list of all your backend servers.
@@ -16,6 +16,16 @@ room_to_server = {}  # Maps room_id to server address
 player_to_room = {}  # Maps player_id to room_id
 session_lock = threading.Lock()
 
+CONTENT_LENGTH_RE = re.compile(rb'^content-length:[ \t]*(\d+)[ \t]*\r?$', re.IGNORECASE | re.MULTILINE)
+
+# How long an idle client connection is kept open between requests
+CLIENT_IDLE_TIMEOUT = 30.0
+
+# Idle keep-alive connections per backend; server_thread_pool_http sizes its
+# worker pool from this, since every open connection occupies one worker there
+POOL_SIZE = 16
+backend_pools = {}  # Maps server address to a list of (reader, writer)
+
 def extract_session_info(request_data):
     """Extract room_id or player_id from the request to determine session affinity"""
     try:
@@ -60,6 +70,27 @@ def extract_session_info(request_data):
         print(f"Error extracting session info: {e}")
     return None, None
 
+async def read_http_message(reader, is_response):
+    """Read one HTTP message, using Content-Length to find the end of the body"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ConnectionError("Connection closed in the middle of the headers") from e
+        return b''  # Closed cleanly before a new message started
+
+    match = CONTENT_LENGTH_RE.search(head, 0, len(head) - 4)
+    if match is None:
+        # Requests without a length have no body; responses run until close
+        if is_response:
+            return head + await reader.read()
+        return head
+
+    try:
+        return head + await reader.readexactly(int(match.group(1)))
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError("Connection closed before the full body arrived") from e
+
 def get_server_for_room(room_id):
     """Get the server address for a given room_id"""
     with session_lock:
@@ -84,159 +115,206 @@ def get_next_server():
 
 server_rotation = get_next_server()
 
-def handle_request(client_socket):
+# Health of each backend as of its last probe
+HEALTH_CHECK_INTERVAL = 2.0
+backend_alive = {}
+
+def next_alive_server():
+    """Round-robin over backends that passed their last health check"""
+    for _ in range(len(BACKEND_SERVERS)):
+        server = next(server_rotation)
+        if backend_alive.get(server, True):
+            return server
+    return next(server_rotation)
+
+async def health_check():
+    """Probe every backend periodically instead of on each request"""
+    while True:
+        for server in BACKEND_SERVERS:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(*server), 0.5)
+                writer.close()
+                backend_alive[server] = True
+            except (OSError, asyncio.TimeoutError):
+                if backend_alive.get(server, True):
+                    print(f"[LB WARNING] Health check failed for {server}")
+                backend_alive[server] = False
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+def keeps_alive(response_data):
+    """Check whether a backend response leaves its connection reusable"""
+    head = response_data.partition(b'\r\n\r\n')[0].lower()
+    return b'content-length:' in head and b'connection: close' not in head
+
+async def acquire_backend(server_address):
+    """Take an idle pooled connection to a backend, or open a new one"""
+    pool = backend_pools.get(server_address)
+    while pool:
+        reader, writer = pool.pop()
+        if not writer.is_closing() and not reader.at_eof():
+            return reader, writer, True
+        writer.close()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(*server_address), 5.0)
+    return reader, writer, False
+
+def release_backend(server_address, reader, writer):
+    """Return a connection to its backend's pool, closing it if the pool is full"""
+    pool = backend_pools.setdefault(server_address, [])
+    if len(pool) < POOL_SIZE:
+        pool.append((reader, writer))
+    else:
+        writer.close()
+
+async def forward_request(server_address, request_data):
+    """Send a request to one backend and return its full response"""
+    while True:
+        reader, writer, reused = await acquire_backend(server_address)
+        try:
+            writer.write(request_data)
+            await writer.drain()
+            response_data = await asyncio.wait_for(read_http_message(reader, is_response=True), 5.0)
+        except BaseException:
+            writer.close()
+            raise
+        if not response_data:
+            writer.close()
+            if reused and reader.at_eof():
+                continue  # The backend closed an idle pooled connection before reading the request
+            raise ConnectionError(f"Backend {server_address} closed the connection without responding")
+        if keeps_alive(response_data):
+            release_backend(server_address, reader, writer)
+        else:
+            writer.close()
+        return response_data
+
+async def route_request(request_data):
     """
-    Handles a client request by forwarding it to the appropriate backend server.
+    Forwards one client request to the appropriate backend server and returns its response.
     Uses session affinity when possible, falls back to round-robin.
     """
+    # 2. Extract session information for sticky routing
+    room_id, player_id = extract_session_info(request_data)
+    server_address = None
+    
+    if room_id:
+        server_address = get_server_for_room(room_id)
+        if server_address:
+            print(f"[LB] Using session affinity for room {room_id} -> {server_address}")
+    
+    # 3. If no server found by room_id, try player_id
+    if not server_address and player_id:
+        with session_lock:
+            room_id = player_to_room.get(player_id)
+            if room_id:
+                server_address = room_to_server.get(room_id)
+                if server_address:
+                    print(f"[LB] Using player {player_id} affinity to room {room_id} -> {server_address}")
+
+    # 4. If still no server, use round-robin
+    if not server_address:
+        server_address = next_alive_server()
+        print(f"[LB] No session info, using round-robin to {server_address}")
+
+    # 5. Forward the request
     try:
-        # 1. Read the full request from the client.
-        request_data = b""
+        print(f"[LB] Forwarding request to {server_address}...")
+        response_data = await forward_request(server_address, request_data)
+        
+        if response_data:
+            # If this was a create_room or join_room request, update our mappings
+            try:
+                response_str = response_data.decode()
+                if '\r\n\r\n' in response_str:
+                    headers, body = response_str.split('\r\n\r\n', 1)
+                    if body:
+                        response_json = json.loads(body)
+                        if response_json.get('success'):
+                            if 'room_id' in response_json and 'player_id' in response_json:
+                                new_room_id = response_json['room_id']
+                                new_player_id = response_json['player_id']
+                                assign_server_to_room(new_room_id, server_address)
+                                assign_player_to_room(new_player_id, new_room_id)
+                                print(f"[LB] Associated room {new_room_id} and player {new_player_id} with {server_address}")
+            except Exception as e:
+                print(f"[LB] Error processing response: {e}")
+            
+            return response_data
+    except (asyncio.TimeoutError, ConnectionRefusedError) as e:
+        backend_alive[server_address] = False
+        print(f"[LB WARNING] Backend {server_address} is unavailable ({e}). Trying next...")
+    except Exception as e:
+        print(f"[LB ERROR] An unexpected error occurred with {server_address}: {e}")
+
+    # 6. If we get here, the server failed - try another one
+    print("[LB] Primary server failed, trying others...")
+    backups = sorted(BACKEND_SERVERS, key=lambda server: not backend_alive.get(server, True))
+    for backup_server in backups:
+        if backup_server == server_address:
+            continue
+            
         try:
-            client_socket.settimeout(2.0)
-            while b'\r\n\r\n' not in request_data:
-                chunk = client_socket.recv(4096)
-                if not chunk:
-                    return  # Client disconnected prematurely
-                request_data += chunk
+            print(f"[LB] Trying backup server {backup_server}...")
+            response_data = await forward_request(backup_server, request_data)
             
-            # Read remaining data if Content-Length specifies more
-            headers = request_data.split(b'\r\n\r\n')[0]
-            if b'Content-Length:' in headers:
-                content_length = int(headers.split(b'Content-Length:')[1].split(b'\r\n')[0].strip())
-                body_start = request_data.find(b'\r\n\r\n') + 4
-                current_body_length = len(request_data) - body_start
-                while current_body_length < content_length:
-                    chunk = client_socket.recv(4096)
-                    if not chunk:
-                        break
-                    request_data += chunk
-                    current_body_length = len(request_data) - body_start
-        except socket.timeout:
-            print("[LB ERROR] Timed out waiting for client request.")
-            return
+            if response_data:
+                return response_data
         except Exception as e:
-            print(f"[LB ERROR] Error reading request: {e}")
-            return
+            print(f"[LB] Backup server {backup_server} failed: {e}")
 
-        if not request_data:
-            return
+    # 7. If all servers failed
+    print("[LB ERROR] All backend servers failed to respond.")
+    return b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
 
-        # 2. Extract session information for sticky routing
-        room_id, player_id = extract_session_info(request_data)
-        server_address = None
-        
-        if room_id:
-            server_address = get_server_for_room(room_id)
-            if server_address:
-                print(f"[LB] Using session affinity for room {room_id} -> {server_address}")
-        
-        # 3. If no server found by room_id, try player_id
-        if not server_address and player_id:
-            with session_lock:
-                room_id = player_to_room.get(player_id)
-                if room_id:
-                    server_address = room_to_server.get(room_id)
-                    if server_address:
-                        print(f"[LB] Using player {player_id} affinity to room {room_id} -> {server_address}")
-
-        # 4. If still no server, use round-robin
-        if not server_address:
-            server_address = next(server_rotation)
-            print(f"[LB] No session info, using round-robin to {server_address}")
-
-        # 5. Forward the request
-        try:
-            print(f"[LB] Forwarding request to {server_address}...")
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-                server_socket.settimeout(5.0)
-                server_socket.connect(server_address)
-                server_socket.sendall(request_data)
-                
-                response_data = b""
-                while True:
-                    chunk = server_socket.recv(4096)
-                    if not chunk:
-                        break
-                    response_data += chunk
-                
-                if response_data:
-                    # If this was a create_room or join_room request, update our mappings
-                    try:
-                        response_str = response_data.decode()
-                        if '\r\n\r\n' in response_str:
-                            headers, body = response_str.split('\r\n\r\n', 1)
-                            if body:
-                                response_json = json.loads(body)
-                                if response_json.get('success'):
-                                    if 'room_id' in response_json and 'player_id' in response_json:
-                                        new_room_id = response_json['room_id']
-                                        new_player_id = response_json['player_id']
-                                        assign_server_to_room(new_room_id, server_address)
-                                        assign_player_to_room(new_player_id, new_room_id)
-                                        print(f"[LB] Associated room {new_room_id} and player {new_player_id} with {server_address}")
-                    except Exception as e:
-                        print(f"[LB] Error processing response: {e}")
-                    
-                    client_socket.sendall(response_data)
-                    return
-        except (socket.timeout, ConnectionRefusedError) as e:
-            print(f"[LB WARNING] Backend {server_address} is unavailable ({e}). Trying next...")
-        except Exception as e:
-            print(f"[LB ERROR] An unexpected error occurred with {server_address}: {e}")
-
-        # 6. If we get here, the server failed - try another one
-        print("[LB] Primary server failed, trying others...")
-        for backup_server in BACKEND_SERVERS:
-            if backup_server == server_address:
-                continue
-                
+async def handle_request(client_reader, client_writer):
+    """Serve successive requests on one client connection until either side closes it"""
+    first_request = True
+    try:
+        while True:
+            # 1. Read the full request from the client.
             try:
-                print(f"[LB] Trying backup server {backup_server}...")
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-                    server_socket.settimeout(5.0)
-                    server_socket.connect(backup_server)
-                    server_socket.sendall(request_data)
-                    
-                    response_data = b""
-                    while True:
-                        chunk = server_socket.recv(4096)
-                        if not chunk:
-                            break
-                        response_data += chunk
-                    
-                    if response_data:
-                        client_socket.sendall(response_data)
-                        return
+                request_data = await asyncio.wait_for(read_http_message(client_reader, is_response=False),
+                                              2.0 if first_request else CLIENT_IDLE_TIMEOUT)
+                if b'\r\n\r\n' not in request_data:
+                    return  # Client disconnected
+            except asyncio.TimeoutError:
+                if first_request:
+                    print("[LB ERROR] Timed out waiting for client request.")
+                return
             except Exception as e:
-                print(f"[LB] Backup server {backup_server} failed: {e}")
+                print(f"[LB ERROR] Error reading request: {e}")
+                return
+
+            response_data = await route_request(request_data)
+            client_writer.write(response_data)
+            await client_writer.drain()
 
-        # 7. If all servers failed
-        print("[LB ERROR] All backend servers failed to respond.")
-        error_response = b"HTTP/1.1 503 Service Unavailable\r\n\r\n"
-        client_socket.sendall(error_response)
+            request_head = request_data.partition(b'\r\n\r\n')[0].lower()
+            if b'connection: close' in request_head or not keeps_alive(response_data):
+                return
+            first_request = False
 
+    except ConnectionError:
+        pass
     finally:
-        client_socket.close()
+        client_writer.close()
 
-def start_load_balancer(host='0.0.0.0', port=8888):
-    balancer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    balancer_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    balancer_socket.bind((host, port))
-    balancer_socket.listen(100)
+async def serve(host, port):
+    server = await asyncio.start_server(handle_request, host, port, backlog=100)
     print(f"[LOAD BALANCER] Listening on {host}:{port}")
     print(f"[LOAD BALANCER] Forwarding traffic to: {BACKEND_SERVERS}")
     print(f"[LOAD BALANCER] Using session affinity for game sessions")
+    checker = asyncio.create_task(health_check())
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            checker.cancel()
 
+def start_load_balancer(host='0.0.0.0', port=8888):
     try:
-        while True:
-            client_socket, client_address = balancer_socket.accept()
-            thread = threading.Thread(target=handle_request, args=(client_socket,), daemon=True)
-            thread.start()
+        asyncio.run(serve(host, port))
     except KeyboardInterrupt:
         print("\nShutting down load balancer.")
-    finally:
-        balancer_socket.close()
 
 if __name__ == "__main__":
-    start_load_balancer()
\ No newline at end of file
+    start_load_balancer()
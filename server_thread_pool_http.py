@@ -1,55 +1,111 @@
-from socket import *
+import re
 import socket
-import time
 import sys
-import logging
-import multiprocessing
 from concurrent.futures import ThreadPoolExecutor
 from https import GameServer
+from loadbalancer import POOL_SIZE
 
 server = GameServer()
 
+# Idle keep-alive connections hold a pool worker, so reap them quickly
+KEEP_ALIVE_TIMEOUT = 5
+
+# Each of the balancer's pooled keep-alive connections pins one worker for as long
+# as it stays open, so size the pool from POOL_SIZE and leave headroom for
+# health-check probes and clients that connect directly
+WORKERS = POOL_SIZE + 16
+
+# Largest request we accept; the JSON API never needs more than a few KB
+MAX_REQUEST_SIZE = 256 * 1024
+TOO_LARGE_RESPONSE = b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+class RequestTooLarge(Exception):
+    pass
+
+CONTENT_LENGTH_RE = re.compile(rb'^content-length:[ \t]*(\d+)[ \t]*\r?$', re.IGNORECASE | re.MULTILINE)
+
+def read_request(connection, buf, n=0):
+    # The first n bytes of buf were received with the previous request; whatever
+    # follows this request is moved to the front of buf and its length returned
+    view = memoryview(buf)
+    needed = None
+    try:
+        while True:
+            if needed is None:
+                header_end = buf.find(b'\r\n\r\n', 0, n)
+                if header_end != -1:
+                    match = CONTENT_LENGTH_RE.search(buf, 0, header_end)
+                    needed = header_end + 4 + (int(match.group(1)) if match else 0)
+                    if needed > MAX_REQUEST_SIZE:
+                        raise RequestTooLarge(f"{needed} byte request")
+                elif n >= MAX_REQUEST_SIZE:
+                    raise RequestTooLarge("request headers too large")
+            if needed is not None and n >= needed:
+                break
+            if n == len(buf):
+                view.release()
+                buf.extend(bytes(len(buf)))
+                view = memoryview(buf)
+            got = connection.recv_into(view[n:])
+            if not got:
+                return None, 0
+            n += got
+    finally:
+        view.release()
+    request = bytes(buf[:needed])
+    leftover = n - needed
+    buf[:leftover] = buf[needed:n]
+    return request, leftover
+
 def ProcessTheClient(connection, address):
     print(f"[SERVER] Connection from {address}")
-    rcv = ""
-    while True:
-        try:
-            data = connection.recv(1024)
-            if data:
-                d = data.decode()
-                rcv += d
-                print("[SERVER] Received:", repr(rcv))
-
-                if '\r\n\r\n' in rcv:
-                    response = server.proses(rcv, connection)
-                    print("[SERVER] Response:", response)
-                    connection.sendall(response)
-                    rcv = ""
-                    connection.close()
-                    return
-            else:
+    connection.settimeout(KEEP_ALIVE_TIMEOUT)
+    buf = bytearray(65536)
+    pending = 0
+    try:
+        while True:
+            request, pending = read_request(connection, buf, pending)
+            if not request:
+                break
+            print("[SERVER] Received:", repr(request))
+            response = server.proses(request, connection)
+            print("[SERVER] Response:", response)
+            connection.sendall(response)
+            if b'connection: close' in request[:request.find(b'\r\n\r\n')].lower():
                 break
-        except OSError as e:
-            print("[SERVER] Error:", e)
+    except socket.timeout:
+        pass
+    except RequestTooLarge as e:
+        print("[SERVER] Rejected:", e)
+        try:
+            connection.sendall(TOO_LARGE_RESPONSE)
+        except OSError:
+            pass
+    except (OSError, ValueError) as e:
+        print("[SERVER] Error:", e)
     connection.close()
 
+# This backend stays on a thread pool on purpose: it is the project's thread-pool
+# server, and the event-driven load balancer in front of it multiplexes clients onto
+# at most POOL_SIZE keep-alive connections, so its thread count no longer grows with players
 def Server():
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8001
-    the_clients = []
+    the_clients = set()
 
     my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     my_socket.bind(('0.0.0.0', port))
-    my_socket.listen(1)
+    my_socket.listen(WORKERS)
 
     print(f"[SERVER] Listening on port {port}")
 
-    with ThreadPoolExecutor(20) as executor:
+    with ThreadPoolExecutor(WORKERS) as executor:
         while True:
             connection, client_address = my_socket.accept()
             p = executor.submit(ProcessTheClient, connection, client_address)
-            the_clients.append(p)
-            jumlah = ['x' for i in the_clients if i.running()==True]
+            the_clients.add(p)
+            p.add_done_callback(the_clients.discard)
+            jumlah = ['x' for i in list(the_clients) if i.running()==True]
             print(jumlah)
 
 def main():